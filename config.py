@@ -6,3 +6,7 @@ load_dotenv()
 
 # Fetch API Key
 API_KEY = os.getenv("API_KEY")
+
+# Async SQLAlchemy URL for the task store (defaults to the local SQLite file).
+# Not DATABASE_URL: hosts such as Railway set that to a sync postgresql:// URL.
+TASKS_DATABASE_URL = os.getenv("TASKS_DATABASE_URL", "sqlite+aiosqlite:///./tasks.db")
@@ -1,17 +1,33 @@
-from sqlalchemy import create_engine, Column, Integer, String
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from config import TASKS_DATABASE_URL
 
-# SQLite Database URL
-DATABASE_URL = "sqlite:///./tasks.db"
+# SQLite connections are shared across threads by the async driver
+connect_args = {"check_same_thread": False} if TASKS_DATABASE_URL.startswith("sqlite") else {}
 
 # Create Engine
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_async_engine(
+    TASKS_DATABASE_URL,
+    connect_args=connect_args,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=20,
+    max_overflow=10,
+    pool_timeout=30,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+)
 
 # Session
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
+# Request-scoped session dependency
+async def get_async_db():
+    async with SessionLocal() as db:
+        yield db
+
 # Task Model
 class Task(Base):
     __tablename__ = "tasks"
@@ -19,5 +35,6 @@ class Task(Base):
     task = Column(String, index=True)
 
 # Create Tables
-def init_db():
-    Base.metadata.create_all(bind=engine)
+async def init_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
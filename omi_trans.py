@@ -1,19 +1,59 @@
+import asyncio
+import hashlib
+import operator
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from fastapi import FastAPI, Request, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-import json
-import ssl
-import http.client as http_client
-from transformers import pipeline  
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import httpx
+import orjson
+from cachetools import TTLCache
 from deep_translator import GoogleTranslator
-from sqlalchemy.orm import Session
-from database import SessionLocal, init_db, Task
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import engine, get_async_db, init_db, Task
 from config import API_KEY
 
-# Initialize Database
-init_db()
+URL = "https://api.groq.com"
+ENDPOINT = "/openai/v1/chat/completions"
+
+# Shared Groq client: pooled keep-alive connections instead of a TLS handshake per request
+GROQ_CLIENT = httpx.AsyncClient(
+    base_url=URL,
+    http2=True,
+    timeout=30,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+)
+
+# Successful Groq replies keyed by sha256 of the question
+_groq_cache = TTLCache(maxsize=10_000, ttl=3600)
+
+# Caps in-flight Groq requests so bursts queue here instead of tripping rate limits.
+# Created on the serving loop: on Python 3.8 a Semaphore binds to the loop it is built on.
+GROQ_MAX_CONCURRENCY = 32
+_GROQ_SEM = None
+
+def groq_semaphore():
+    """Returns the Groq semaphore, creating it on the running loop if needed."""
+    global _GROQ_SEM
+    if _GROQ_SEM is None:
+        _GROQ_SEM = asyncio.Semaphore(GROQ_MAX_CONCURRENCY)
+    return _GROQ_SEM
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _GROQ_SEM
+    _GROQ_SEM = asyncio.Semaphore(GROQ_MAX_CONCURRENCY)
+    # Initialize Database before serving so the pool is warm
+    await init_db()
+    yield
+    await GROQ_CLIENT.aclose()
+    await engine.dispose()
 
 # FastAPI Setup
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -22,81 +62,190 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-URL = "api.groq.com"
-ENDPOINT = "/openai/v1/chat/completions"
+GROQ_HEADERS = {
+    "Content-Type": "application/json",
+    "Authorization": f"Bearer {API_KEY}"
+}
 
-def ask_groq(question):
-    """Fetch response from Groq API."""
-    context = ssl.SSLContext(ssl.PROTOCOL_TLSv1_2)
-    conn = http_client.HTTPSConnection(URL, context=context)
-    payload = {
+def groq_payload(question, stream=False):
+    """Builds the chat completion request body for a question."""
+    return {
         "model": "llama-3.3-70b-versatile",
         "messages": [
             {"role": "system", "content": "Always provide a direct answer or suggestion."},
             {"role": "user", "content": question}
-        ]
+        ],
+        "stream": stream,
     }
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {API_KEY}"
-    }
-    conn.request("POST", ENDPOINT, body=json.dumps(payload), headers=headers)
-    res = conn.getresponse()
-    data = res.read()
-    
-    if res.status == 200:
-        return json.loads(data.decode("utf-8"))["choices"][0]["message"]["content"]
+
+async def ask_groq(question):
+    """Fetch response from Groq API."""
+    key = hashlib.sha256(question.encode("utf-8")).hexdigest()
+    cached = _groq_cache.get(key)
+    if cached is not None:
+        return cached
+
+    async with groq_semaphore():
+        res = await GROQ_CLIENT.post(ENDPOINT, content=orjson.dumps(groq_payload(question)), headers=GROQ_HEADERS)
+
+    if res.status_code == 200:
+        answer = orjson.loads(res.content)["choices"][0]["message"]["content"]
+        _groq_cache[key] = answer
+        return answer
     else:
-        return f"❌ Error {res.status}: {data.decode('utf-8')}"
+        return f"❌ Error {res.status_code}: {res.text}"
+
+async def stream_groq(question):
+    """Yields Groq response chunks as they are generated."""
+    key = hashlib.sha256(question.encode("utf-8")).hexdigest()
+    cached = _groq_cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    chunks = []
+    done = False
+    # The slot is held until the upstream stream is drained, and draining is paced
+    # by the SSE client, so slow readers count against GROQ_MAX_CONCURRENCY too.
+    async with groq_semaphore():
+        body = orjson.dumps(groq_payload(question, stream=True))
+        async with GROQ_CLIENT.stream("POST", ENDPOINT, content=body, headers=GROQ_HEADERS) as res:
+            if res.status_code != 200:
+                data = await res.aread()
+                yield f"❌ Error {res.status_code}: {data.decode('utf-8')}"
+                return
+
+            async for line in res.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                data = line[len("data: "):]
+                if data == "[DONE]":
+                    done = True
+                    break
+                event = orjson.loads(data)
+                choices = event.get("choices")
+                if not choices:
+                    error = event.get("error")
+                    if error:
+                        message = error.get("message", error) if isinstance(error, dict) else error
+                        yield f"❌ Error: {message}"
+                        return
+                    continue
+                chunk = choices[0].get("delta", {}).get("content")
+                if chunk:
+                    chunks.append(chunk)
+                    yield chunk
+
+    # Only complete replies are cached, matching ask_groq
+    if done and chunks:
+        _groq_cache[key] = "".join(chunks)
 
 def summarize_text(text, max_lines=3, max_length=150):
     """Summarizes the text into a maximum number of lines."""
     if len(text) > max_length:
         # Shorten the response to fit into max_lines
-        lines = text.split(".")
+        lines = text.split(".", max_lines)
         summarized = ". ".join(lines[:max_lines]) + "."
         return summarized
     return text
 
-def translate_to_english(text):
+# Common English function words. Words that are also frequent in romanized Hindi
+# or Spanish ("a", "no", "me", "to", "hi", "so") are left out on purpose.
+ENGLISH_STOPWORDS = frozenset((
+    "the", "and", "is", "are", "was", "were", "be", "been", "have", "has", "had",
+    "do", "does", "did", "i", "you", "we", "they", "it", "this", "that", "what",
+    "how", "why", "when", "where", "who", "of", "on", "for", "with", "at", "from",
+    "my", "your", "our", "their", "can", "will", "would", "should", "could", "not",
+    "there", "about", "just", "am", "an", "if", "but", "or", "please", "thanks", "hello",
+))
+
+def looks_english(text):
+    """Cheap check that text is ASCII and at least a fifth English stopwords."""
+    if not text.isascii():
+        return False
+    words = [word.strip(".,!?;:'\"()") for word in text.lower().split()]
+    hits = sum(word in ENGLISH_STOPWORDS for word in words)
+    return hits > 0 and hits * 5 >= len(words)
+
+@lru_cache(maxsize=4096)
+def _translate_cached(text):
+    """Blocking translation call; failures raise so they are not cached."""
+    return GoogleTranslator(source='auto', target='en').translate(text)
+
+async def translate_to_english(text):
     """Translates text to English if necessary."""
+    if looks_english(text):
+        return text  # Already English; skip the translator round trip
     try:
-        return GoogleTranslator(source='auto', target='en').translate(text)
+        return await run_in_threadpool(_translate_cached, text.strip())
     except Exception:
         return text  # Fallback to original text
 
+get_segment_text = operator.methodcaller("get", "text")
+
+def join_segments(segments):
+    """Joins the text of transcription segments, skipping empty ones."""
+    return " ".join(filter(None, map(get_segment_text, segments))).strip()
+
 @app.post("/livetranscript")
 async def live_transcription(request: Request):
     """Processes transcription, translates if needed, and sends response."""
     try:
-        data = await request.json()
+        data = orjson.loads(await request.body())
         segments = data.get("segments", [])
         if not segments:
             return {"message": "No transcription received"}
 
-        transcript = " ".join(segment["text"] for segment in segments if "text" in segment).strip()
+        transcript = join_segments(segments)
         if not transcript:
             return {"message": "No valid transcription received"}
         
-        translated_text = translate_to_english(transcript)
-        ai_response = ask_groq(translated_text)
+        translated_text = await translate_to_english(transcript)
+        ai_response = await ask_groq(translated_text)
         notification_message = summarize_text(ai_response)
         
         return {"message": notification_message, "response": ai_response}
     except Exception:
         return {"message": "Internal Server Error"}
 
+@app.post("/livetranscript/stream")
+async def live_transcription_stream(request: Request):
+    """Processes transcription and streams the AI response as server-sent events."""
+    try:
+        data = orjson.loads(await request.body())
+        segments = data.get("segments", [])
+        if not segments:
+            return {"message": "No transcription received"}
+
+        transcript = join_segments(segments)
+        if not transcript:
+            return {"message": "No valid transcription received"}
+
+        translated_text = await translate_to_english(transcript)
+    except Exception:
+        return {"message": "Internal Server Error"}
+
+    async def events():
+        try:
+            async for chunk in stream_groq(translated_text):
+                yield b"data: " + orjson.dumps({"content": chunk}) + b"\n\n"
+        except Exception:
+            yield b"data: " + orjson.dumps({"message": "Internal Server Error"}) + b"\n\n"
+        yield b"data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 @app.post("/webhook")
 async def receive_transcription(request: Request):
     """Webhook endpoint to receive transcriptions."""
     try:
-        data = await request.json()
+        data = orjson.loads(await request.body())
         transcript = data.get("transcript", "").strip()
         if not transcript:
             return {"message": "No transcription received"}
 
-        translated_text = translate_to_english(transcript)
-        ai_response = ask_groq(translated_text)
+        translated_text = await translate_to_english(transcript)
+        ai_response = await ask_groq(translated_text)
 
         notification_message = summarize_text(ai_response)
         return {"message": "Webhook received", "response": ai_response, "notification": notification_message}
@@ -105,25 +254,33 @@ async def receive_transcription(request: Request):
 
 # Task Management API
 @app.get("/tasks")
-def get_tasks(db: Session = Depends(SessionLocal)):
-    return {"tasks": db.query(Task).all()}
+async def get_tasks(db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(Task))
+    return {"tasks": result.scalars().all()}
 
 @app.post("/tasks")
-def add_task(task_text: str, db: Session = Depends(SessionLocal)):
+async def add_task(task_text: str, db: AsyncSession = Depends(get_async_db)):
     new_task = Task(task=task_text)
     db.add(new_task)
-    db.commit()
+    await db.commit()
     return {"message": "Task added successfully!"}
 
 @app.delete("/tasks/{task_id}")
-def delete_task(task_id: int, db: Session = Depends(SessionLocal)):
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if task:
-        db.delete(task)
-        db.commit()
+async def delete_task(task_id: int, db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(delete(Task).where(Task.id == task_id))
+    await db.commit()
+    if result.rowcount:
         return {"message": "Task deleted successfully!"}
     return {"error": "Task not found"}
 
 if __name__ == "__main__":
+    import os
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        "omi_trans:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=max(2, os.cpu_count() or 1),
+        loop="uvloop",
+        http="httptools",
+    )